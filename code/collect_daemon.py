@@ -0,0 +1,287 @@
+import os
+import json
+import time
+import math
+import datetime
+import pandas as pd
+from gql import gql
+
+from collect_data_3 import (
+    PRS_PAGE_SIZE,
+    PAGE_THROTTLE_S,
+    OUTPUT_FILE,
+    collect_repos,
+    collect_repo_prs,
+    execute_with_retries,
+    filter_pull_requests,
+    pr_to_row,
+)
+
+# ---------------- Config ----------------
+STATE_FILE = "collect_state.json"  # estado por repositório (última coleta, taxa de PRs)
+MAX_PAGES_PER_REFRESH = 5          # limite de páginas por atualização de um repositório
+REPOS_REFRESH_S = 6 * 3600         # intervalo para rebuscar a lista de repositórios (pushedAt)
+RATE_LIMIT_RESERVE = 200           # pontos da API preservados antes de aguardar o reset
+PUSHED_HALF_LIFE_DAYS = 7.0        # meia-vida da atividade desde o último push
+RATE_SMOOTHING = 0.3               # peso da taxa observada na média móvel de PRs/dia
+MIN_EXPECTED_PRS = 1.0             # abaixo disso, nenhuma atualização compensa
+IDLE_SLEEP_S = 300                 # espera quando nenhum repositório compensa atualizar
+
+# --------- Queries ----------
+Q_RATE_LIMIT = gql("""
+query {
+  rateLimit { remaining resetAt }
+}
+""")
+
+Q_REPO_UPDATED_PRS = gql("""
+query ($owner: String!, $name: String!, $cursor: String, $pageSize: Int!) {
+  rateLimit { remaining resetAt }
+  repository(owner: $owner, name: $name) {
+    pushedAt
+    pullRequests(
+      states: [MERGED, CLOSED]
+      orderBy: {field: UPDATED_AT, direction: DESC}
+      first: $pageSize
+      after: $cursor
+    ) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        number
+        title
+        url
+        state
+        createdAt
+        updatedAt
+        closedAt
+        mergedAt
+        author { login }
+        bodyText
+        reviews { totalCount }
+        participants { totalCount }
+        comments { totalCount }
+        additions
+        deletions
+        changedFiles
+      }
+    }
+  }
+}
+""")
+
+# --------------- Utilidades ---------------
+def parse_dt(value):
+    if not value:
+        return None
+    return datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+def utcnow():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+def load_state():
+    if not os.path.exists(STATE_FILE):
+        return {}
+    with open(STATE_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_state(state):
+    tmp = STATE_FILE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, STATE_FILE)
+
+def load_dataset():
+    """Retorna as URLs de PRs já salvas e o último closedAt conhecido por repositório"""
+    if not os.path.exists(OUTPUT_FILE):
+        return set(), {}
+    df = pd.read_csv(OUTPUT_FILE, usecols=["repo_owner", "repo_name", "pr_url", "pr_closedAt"], dtype=str)
+    seen = set(df["pr_url"])
+    df["key"] = df["repo_owner"] + "/" + df["repo_name"]
+    last_closed = df.dropna(subset=["pr_closedAt"]).groupby("key")["pr_closedAt"].max().to_dict()
+    return seen, last_closed
+
+# --------------- Prioridade ---------------
+def sync_repos(state, last_closed):
+    """Atualiza metadados (pushedAt, estrelas), inclui repositórios novos da busca
+    e remove os que saíram dela"""
+    now = utcnow()
+    current = set()
+    for edge in collect_repos():
+        repo = edge["node"]
+        if repo["pullRequests"]["totalCount"] < 100:
+            continue
+        key = f"{repo['owner']['login']}/{repo['name']}"
+        current.add(key)
+        entry = state.setdefault(key, {
+            "last_fetched_at": last_closed.get(key),
+            "pr_rate": None,
+        })
+        entry["repo"] = {
+            "name": repo["name"],
+            "owner": {"login": repo["owner"]["login"]},
+            "url": repo["url"],
+            "stargazerCount": repo["stargazerCount"],
+        }
+        entry["pushed_at"] = repo["pushedAt"]
+        if entry["pr_rate"] is None:
+            # Taxa histórica: PRs fechados/mergeados por dia desde a criação
+            age_days = max(1.0, (now - parse_dt(repo["createdAt"])).total_seconds() / 86400)
+            entry["pr_rate"] = repo["pullRequests"]["totalCount"] / age_days
+
+    for key in set(state) - current:
+        print(f"  {key} saiu da busca; deixando de atualizar")
+        del state[key]
+
+def expected_new_prs(entry, now):
+    """Estimativa de PRs novos desde a última coleta (taxa x tempo x atividade)"""
+    retry_after = parse_dt(entry.get("retry_after"))
+    if retry_after is not None and retry_after > now:
+        return 0.0
+    last_fetched = parse_dt(entry.get("last_fetched_at"))
+    if last_fetched is None:
+        return math.inf
+    days_since_fetch = (now - last_fetched).total_seconds() / 86400
+    pushed = parse_dt(entry.get("pushed_at"))
+    if pushed is not None and pushed > last_fetched:
+        activity = 1.0
+    else:
+        # Sem push desde a coleta: decai conforme o push mais recente envelhece
+        days_since_push = (now - pushed).total_seconds() / 86400 if pushed else math.inf
+        activity = 0.5 ** (days_since_push / PUSHED_HALF_LIFE_DAYS)
+    return entry["pr_rate"] * days_since_fetch * activity
+
+# --------------- Coleta ---------------
+def wait_for_budget(rate_limit):
+    if not rate_limit or rate_limit["remaining"] >= RATE_LIMIT_RESERVE:
+        return
+    wait = max(0.0, (parse_dt(rate_limit["resetAt"]) - utcnow()).total_seconds()) + 1
+    print(f"Orçamento da API em {rate_limit['remaining']} pontos; aguardando {wait:.0f}s até o reset…")
+    time.sleep(wait)
+
+def save_rows(repo, prs, seen):
+    """Anexa ao CSV os PRs válidos ainda não salvos"""
+    rows = [pr_to_row(repo, pr) for pr in prs if pr["url"] not in seen]
+    if rows:
+        seen.update(row["pr_url"] for row in rows)
+        df = pd.DataFrame(rows)
+        df.to_csv(OUTPUT_FILE, mode="a", header=not os.path.exists(OUTPUT_FILE), index=False, encoding="utf-8")
+    return len(rows)
+
+def refresh_repo(entry, seen):
+    """Busca PRs fechados desde a última coleta e anexa os novos ao CSV"""
+    repo = entry["repo"]
+    owner = repo["owner"]["login"]
+    name = repo["name"]
+    since = parse_dt(entry.get("last_fetched_at"))
+    started = utcnow()
+
+    if since is None:
+        # Repositório nunca coletado: mesma amostra de collect_data_3 (por CREATED_AT)
+        prs = collect_repo_prs(owner, name, 0)
+        entry["last_fetched_at"] = started.isoformat()
+        entry.pop("retry_after", None)
+        rate_limit = execute_with_retries(Q_RATE_LIMIT, {}).get("rateLimit")
+        return save_rows(repo, prs, seen), rate_limit
+
+    # Continua de onde a atualização anterior parou, se ela atingiu o limite de páginas
+    cursor = entry.get("resume_cursor")
+    resumed = cursor is not None
+    # Após uma janela retomada, PRs fechados nela podem ter sido atualizados e
+    # pulados pelo cursor; mantém o início dela como limite inferior de closedAt
+    closed_since = parse_dt(entry.get("closed_since")) or since
+    closed_count = 0
+    saved = 0
+    rate_limit = None
+    complete = False
+    for _ in range(MAX_PAGES_PER_REFRESH):
+        data = execute_with_retries(Q_REPO_UPDATED_PRS, {"owner": owner, "name": name, "cursor": cursor, "pageSize": PRS_PAGE_SIZE})
+        rate_limit = data.get("rateLimit")
+        entry["pushed_at"] = data["repository"]["pushedAt"]
+        prs = data["repository"]["pullRequests"]
+        nodes = prs.get("nodes", []) or []
+
+        # Ordenados por updatedAt: ao passar de `since`, o restante já foi visto.
+        # PRs antigos que só receberam comentários/edições não são dados novos.
+        recent = [pr for pr in nodes if parse_dt(pr["updatedAt"]) > since]
+        closed = [pr for pr in recent if parse_dt(pr["closedAt"] or pr["mergedAt"]) > closed_since]
+        closed_count += len(closed)
+        saved += save_rows(repo, filter_pull_requests(closed), seen)
+
+        cursor = prs["pageInfo"]["endCursor"]
+        if len(recent) < len(nodes) or not prs["pageInfo"]["hasNextPage"]:
+            complete = True
+            break
+        time.sleep(PAGE_THROTTLE_S)
+
+    if not complete:
+        # Limite de páginas atingido antes de `since`: guarda o cursor e mantém
+        # last_fetched_at para retomar a janela na próxima atualização
+        entry.setdefault("resume_started", started.isoformat())
+        entry["resume_cursor"] = cursor
+        print(f"  {owner}/{name}: limite de {MAX_PAGES_PER_REFRESH} páginas atingido; retomando depois")
+        return saved, rate_limit
+
+    if not resumed:
+        # Só atualiza a taxa quando a janela inteira foi lida de uma vez
+        days = max((started - closed_since).total_seconds() / 86400, 1 / 24)
+        entry["pr_rate"] = (1 - RATE_SMOOTHING) * entry["pr_rate"] + RATE_SMOOTHING * (closed_count / days)
+    if resumed:
+        entry["closed_since"] = closed_since.isoformat()
+    else:
+        entry.pop("closed_since", None)
+    entry["last_fetched_at"] = entry.pop("resume_started", started.isoformat())
+    entry.pop("resume_cursor", None)
+    entry.pop("retry_after", None)
+    return saved, rate_limit
+
+def run(max_refreshes=None):
+    state = load_state()
+    seen, last_closed = load_dataset()
+    next_sync = 0.0
+    rate_limit = None
+    refreshes = 0
+
+    try:
+        while max_refreshes is None or refreshes < max_refreshes:
+            wait_for_budget(rate_limit)
+            rate_limit = None
+
+            if time.monotonic() >= next_sync:
+                try:
+                    sync_repos(state, last_closed)
+                except Exception as e:
+                    # Mantém o estado atual e tenta a busca de novo mais tarde
+                    print(f"⚠ Erro ao atualizar a lista de repositórios: {e}")
+                    next_sync = time.monotonic() + IDLE_SLEEP_S
+                else:
+                    save_state(state)
+                    next_sync = time.monotonic() + REPOS_REFRESH_S
+
+            now = utcnow()
+            if not state:
+                time.sleep(IDLE_SLEEP_S)
+                continue
+            key, entry = max(state.items(), key=lambda item: expected_new_prs(item[1], now))
+            score = expected_new_prs(entry, now)
+            if score < MIN_EXPECTED_PRS:
+                print(f"Nenhum repositório com dados novos esperados; aguardando {IDLE_SLEEP_S}s…")
+                time.sleep(IDLE_SLEEP_S)
+                continue
+
+            print(f"Atualizando {key} (~{score:.1f} PRs novos esperados)…")
+            try:
+                saved, rate_limit = refresh_repo(entry, seen)
+            except Exception as e:
+                # Adia o repositório sem avançar last_fetched_at, para não perder PRs
+                print(f"⚠ Erro no repo {key}: {e}")
+                entry["retry_after"] = (utcnow() + datetime.timedelta(seconds=REPOS_REFRESH_S)).isoformat()
+            else:
+                print(f"✔ {key}: {saved} PRs novos salvos")
+            save_state(state)
+            refreshes += 1
+    except KeyboardInterrupt:
+        print("\nInterrompido; salvando estado…")
+        save_state(state)
+
+if __name__ == "__main__":
+    run()
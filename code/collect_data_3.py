@@ -178,6 +178,32 @@ def collect_repo_prs(owner: str, name: str, total_prs: int):
     # Retorna apenas os primeiros MAX_PRS_PER_REPO PRs válidos
     return collected[:MAX_PRS_PER_REPO]
 
+def pr_to_row(repo, pr):
+    """Monta a linha do CSV para um PR válido de um repositório"""
+    return {
+        "repo_name": repo["name"],
+        "repo_owner": repo["owner"]["login"],
+        "repo_url": repo["url"],
+        "repo_stars": repo["stargazerCount"],
+
+        "pr_number": pr["number"],
+        "pr_title": pr["title"],
+        "pr_url": pr["url"],
+        "pr_author": (pr.get("author") or {}).get("login"),
+        "pr_state": pr["state"],
+        "pr_createdAt": pr["createdAt"],
+        "pr_closedAt": pr.get("closedAt"),
+        "pr_mergedAt": pr.get("mergedAt"),
+        "pr_reviews": pr["reviews"]["totalCount"],
+
+        "pr_description_len": len(pr.get("bodyText") or ""),
+        "pr_participants": pr["participants"]["totalCount"],
+        "pr_comments": pr["comments"]["totalCount"],
+        "pr_additions": pr["additions"],
+        "pr_deletions": pr["deletions"],
+        "pr_changed_files": pr["changedFiles"],
+    }
+
 def process_repository(edge):
     repo = edge["node"]
     if repo["pullRequests"]["totalCount"] < 100:
@@ -188,32 +214,7 @@ def process_repository(edge):
     print(f"Processando repositório {owner}/{name}…")
 
     valid_prs = collect_repo_prs(owner, name, repo["pullRequests"]["totalCount"])
-    rows = []
-    for pr in valid_prs:
-        rows.append({
-            "repo_name": name,
-            "repo_owner": owner,
-            "repo_url": repo["url"],
-            "repo_stars": repo["stargazerCount"],
-
-            "pr_number": pr["number"],
-            "pr_title": pr["title"],
-            "pr_url": pr["url"],
-            "pr_author": (pr.get("author") or {}).get("login"),
-            "pr_state": pr["state"],
-            "pr_createdAt": pr["createdAt"],
-            "pr_closedAt": pr.get("closedAt"),
-            "pr_mergedAt": pr.get("mergedAt"),
-            "pr_reviews": pr["reviews"]["totalCount"],
-
-            "pr_description_len": len(pr.get("bodyText") or ""),
-            "pr_participants": pr["participants"]["totalCount"],
-            "pr_comments": pr["comments"]["totalCount"],
-            "pr_additions": pr["additions"],
-            "pr_deletions": pr["deletions"],
-            "pr_changed_files": pr["changedFiles"],
-        })
-    return rows
+    return [pr_to_row(repo, pr) for pr in valid_prs]
 
 def run():
     repos = collect_repos()